@@ -11,6 +11,7 @@ import plistlib
 import shutil
 import stat
 import subprocess
+import sys
 import tempfile
 
 from signing import logger
@@ -95,6 +96,44 @@ def run_command_output(args, **kwargs):
     return subprocess.check_output(args, **kwargs)
 
 
+def run_commands_parallel(commands_list, **kwargs):
+    """Runs several commands concurrently, waiting for all of them to exit.
+
+    Each child's stdout and stderr are buffered and printed in command order
+    after every child has exited, so interleaved output from the concurrent
+    children does not scramble the log.
+
+    Args:
+        commands_list: A list of command argument lists.
+
+    Raises:
+        subprocess.CalledProcessError for the first command in the list that
+        exited non-zero.
+    """
+    processes = []
+    for args in commands_list:
+        logger.info('Running command: %s', args)
+        processes.append(
+            subprocess.Popen(
+                args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                **kwargs))
+
+    failure = None
+    # Note: the builtin zip() is shadowed by this module's zip() above.
+    for index, process in enumerate(processes):
+        (output, _) = process.communicate()
+        if output:
+            sys.stdout.write(output.decode('utf-8', errors='replace'))
+        if process.returncode and failure is None:
+            failure = subprocess.CalledProcessError(process.returncode,
+                                                    commands_list[index],
+                                                    output)
+    if failure is not None:
+        raise failure
+
+
 def lenient_run_command_output(args, **kwargs):
     """Runs a command, being fairly tolerant of errors.
 
@@ -116,13 +155,27 @@ def lenient_run_command_output(args, **kwargs):
 
 
 def macos_version():
-    """Determines the macOS version of the running system.
+    """Determines the macOS version of the running system. The version is
+    constant for the lifetime of the process, so it is only determined once.
 
     Returns:
         A list containing one element for each component of the version number,
         such as [10, 15, 6] and [11, 0].
     """
-    return [int(x) for x in platform.mac_ver()[0].split('.')]
+    global _macos_version
+    if _macos_version is None:
+        _macos_version = [int(x) for x in platform.mac_ver()[0].split('.')]
+    return _macos_version
+
+
+_macos_version = None
+
+
+def machine():
+    """Returns the machine hardware name of the running system, such as
+    'x86_64' or 'arm64'.
+    """
+    return platform.machine()
 
 
 def read_plist(path):
@@ -245,6 +245,28 @@ class TestCommands(unittest.TestCase):
             self.assertEqual(b'Error.', os.read(r, 128))
         os.close(r)
 
+    def test_run_commands_parallel(self):
+        paths = [
+            os.path.join(self.tempdir, 'touch1.txt'),
+            os.path.join(self.tempdir, 'touch2.txt')
+        ]
+        commands.run_commands_parallel([['touch', path] for path in paths])
+        for path in paths:
+            self.assertTrue(commands.file_exists(path))
+
+    def test_run_commands_parallel_failure(self):
+        try:
+            commands.run_commands_parallel([
+                ['echo', 'hello'],
+                [
+                    sys.executable, '-c',
+                    'import sys; sys.stderr.write("Error."); sys.exit(12)'
+                ],
+            ])
+            self.fail('Should have thrown')
+        except subprocess.CalledProcessError as e:
+            self.assertEqual(12, e.returncode)
+
     def test_lenient_run_command_output(self):
         # Successful command, output on stdout.
         (returncode, stdout,
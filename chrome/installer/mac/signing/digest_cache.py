@@ -0,0 +1,77 @@
+# Copyright 2024 The Chromium Authors
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+"""
+The digest_cache module maintains a persistent cache of file digests, keyed
+on file identity, so that resources that have not changed between signing
+runs over the same tree do not need to be re-hashed.
+"""
+
+import hashlib
+import os.path
+import sqlite3
+import threading
+
+
+class DigestCache(object):
+    """A cache of SHA-256 file digests backed by a sqlite database.
+
+    Digests are keyed on the file's real path, modification time, and size,
+    so a file that changes on disk automatically invalidates its own entry.
+    A single instance may be shared between threads; database access is
+    serialized by a lock, while hashing itself runs unlocked.
+    """
+
+    def __init__(self, db_path):
+        """Opens or creates the cache database.
+
+        Args:
+            db_path: The path to the sqlite database file.
+        """
+        # The lock serializes all use of the connection, so it is safe to
+        # let it cross threads.
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute('CREATE TABLE IF NOT EXISTS digests ('
+                         'path TEXT, mtime_ns INTEGER, size INTEGER, '
+                         'sha256 TEXT, PRIMARY KEY (path, mtime_ns, size))')
+
+    def get_or_compute(self, path):
+        """Returns the SHA-256 digest of the file at |path|, reusing a cached
+        digest if the file is unchanged since it was last hashed.
+
+        Args:
+            path: The path to the file to digest.
+
+        Returns:
+            The file's SHA-256 digest as a hex string.
+        """
+        real_path = os.path.realpath(path)
+        st = os.stat(real_path)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT sha256 FROM digests WHERE path = ? AND mtime_ns = ? '
+                'AND size = ?',
+                (real_path, st.st_mtime_ns, st.st_size)).fetchone()
+        if row is not None:
+            return row[0]
+
+        digest = _file_sha256(real_path)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?)',
+                (real_path, st.st_mtime_ns, st.st_size, digest))
+            self._db.commit()
+        return digest
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
@@ -0,0 +1,84 @@
+# Copyright 2024 The Chromium Authors
+# Use of this source code is governed by a BSD-style license that can be
+# found in the LICENSE file.
+
+import hashlib
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from signing import digest_cache
+
+
+class TestDigestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = digest_cache.DigestCache(
+            os.path.join(self.temp_dir.name, 'cache.db'))
+
+    def tearDown(self):
+        self.cache.close()
+        self.temp_dir.cleanup()
+
+    def _write_file(self, name, contents):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(contents)
+        return path
+
+    def test_compute(self):
+        path = self._write_file('file.txt', b'contents')
+        self.assertEqual(
+            hashlib.sha256(b'contents').hexdigest(),
+            self.cache.get_or_compute(path))
+
+    def test_cached_not_rehashed(self):
+        path = self._write_file('file.txt', b'contents')
+        digest = self.cache.get_or_compute(path)
+        with mock.patch('signing.digest_cache._file_sha256') as file_sha256:
+            self.assertEqual(digest, self.cache.get_or_compute(path))
+            file_sha256.assert_not_called()
+
+    def test_changed_file_rehashed(self):
+        path = self._write_file('file.txt', b'contents')
+        self.cache.get_or_compute(path)
+        self._write_file('file.txt', b'other contents!')
+        self.assertEqual(
+            hashlib.sha256(b'other contents!').hexdigest(),
+            self.cache.get_or_compute(path))
+
+    def test_persists_across_instances(self):
+        path = self._write_file('file.txt', b'contents')
+        digest = self.cache.get_or_compute(path)
+        other = digest_cache.DigestCache(
+            os.path.join(self.temp_dir.name, 'cache.db'))
+        try:
+            with mock.patch(
+                    'signing.digest_cache._file_sha256') as file_sha256:
+                self.assertEqual(digest, other.get_or_compute(path))
+                file_sha256.assert_not_called()
+        finally:
+            other.close()
+
+    def test_shared_across_threads(self):
+        path = self._write_file('file.txt', b'contents')
+        digest = self.cache.get_or_compute(path)
+        results = {}
+
+        def worker():
+            # The parallel signing paths share one cache between thread-pool
+            # workers; make sure the connection can cross threads.
+            results['digest'] = self.cache.get_or_compute(path)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertEqual(digest, results.get('digest'))
+
+    def test_missing_file(self):
+        self.assertRaises(
+            OSError, lambda: self.cache.get_or_compute(
+                os.path.join(self.temp_dir.name, 'missing.txt')))
@@ -69,7 +69,8 @@ class Interface(Base):
                      config,
                      product,
                      path,
-                     replace_existing_signature=False):
+                     replace_existing_signature=False,
+                     skip_descendants=False):
             """Signs the specified `product` that is located inside the
             directory specified by `path`.
 
@@ -82,9 +83,36 @@ class Interface(Base):
                 replace_existing_signature: A boolean as to whether any
                     existing signature on the product (e.g. one emitted by the
                     linker) should be replaced.
+                skip_descendants: A boolean as to whether any nested code in
+                    the product was already signed by the caller, in which
+                    case the implementation must not recursively re-sign or
+                    re-hash descendants (e.g. via `--deep`).
             """
             raise NotImplementedError('codesign')
 
+        def codesign_batch(self,
+                           config,
+                           products,
+                           path,
+                           replace_existing_signature=False):
+            """Signs the specified `products`, all of which are located inside
+            the directory specified by `path`, using a single `codesign`
+            invocation. Every product in `products` must produce an identical
+            set of codesign flags, so that the flags can be specified once and
+            each product's path appended as a trailing argument.
+
+            Args:
+                config: The `config.CodeSignConfig`.
+                products: A list of `model.CodeSignedProduct`s that share
+                    identical signing options.
+                path: A string path at which the `products` and any associated
+                    resources can be found.
+                replace_existing_signature: A boolean as to whether any
+                    existing signatures on the products (e.g. ones emitted by
+                    the linker) should be replaced.
+            """
+            raise NotImplementedError('codesign_batch')
+
     @property
     def signer(self):
         """Returns an instance of `invoker.Interface.Signer`."""
@@ -7,6 +7,7 @@ This module contains classes that encapsulate data about the signing process.
 """
 
 import enum
+import functools
 import os.path
 import re
 import string
@@ -51,7 +52,8 @@ class CodeSignedProduct(object):
                  identifier_requirement=True,
                  sign_with_identifier=False,
                  entitlements=None,
-                 verify_options=None):
+                 verify_options=None,
+                 children_already_signed=False):
         """A build product to be codesigned.
 
         Args:
@@ -76,6 +78,11 @@ class CodeSignedProduct(object):
                 with. The file should reside in the |Paths.packaging_dir|.
             verify_options: |VerifyOptions| flags to pass to `codesign
                 --verify`.
+            children_already_signed: If True, any nested code in the product
+                was already signed by the same signing pass, so the signer
+                must not recursively re-sign or re-hash descendants (e.g. via
+                `--deep`) when signing this product. Drivers that sign
+                bundles inside-out set this on parent products.
         """
         self.path = path
         self.identifier = identifier
@@ -89,10 +96,16 @@ class CodeSignedProduct(object):
         if verify_options and not isinstance(verify_options, VerifyOptions):
             raise ValueError('Must be a VerifyOptions')
         self.verify_options = verify_options
+        self.children_already_signed = children_already_signed
+        self._requirements_string_cache = None
 
     def requirements_string(self, config):
         """Produces a full requirements string for the product.
 
+        The result only depends on the config's identity and basic
+        requirements, so it is cached per product, which keeps the batched
+        signing paths from rebuilding the same string for every invocation.
+
         Args:
             config: A |config.CodeSignConfig| object.
 
@@ -100,6 +113,11 @@ class CodeSignedProduct(object):
             A string for designated requirements of the product, which can be
             passed to `codesign --requirements`.
         """
+        cache_key = (config.identity, config.codesign_requirements_basic)
+        cached = self._requirements_string_cache
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+
         # If the signing identity indicates ad-hoc (i.e. no real signing
         # identity), do not enforce any requirements. Ad hoc signing will append
         # a hash to the identifier, which would violate the
@@ -111,23 +129,72 @@ class CodeSignedProduct(object):
         # requirement customization is unnecessary.
         if config.identity == '-' or (not self.requirements and
                                       not config.codesign_requirements_basic):
-            return ''
-
-        reqs = []
-        if self.identifier_requirement:
-            reqs.append('designated => identifier "{identifier}"'.format(
-                identifier=self.identifier))
-        if self.requirements:
-            reqs.append(self.requirements)
-        if config.codesign_requirements_basic:
-            reqs.append(config.codesign_requirements_basic)
-        return ' '.join(reqs)
+            result = ''
+        else:
+            reqs = []
+            if self.identifier_requirement:
+                reqs.append('designated => identifier "{identifier}"'.format(
+                    identifier=self.identifier))
+            if self.requirements:
+                reqs.append(self.requirements)
+            if config.codesign_requirements_basic:
+                reqs.append(config.codesign_requirements_basic)
+            result = ' '.join(reqs)
+
+        self._requirements_string_cache = (cache_key, result)
+        return result
 
     def __repr__(self):
         return 'CodeSignedProduct(identifier={0.identifier}, ' \
                 'options={0.options}, path={0.path})'.format(self)
 
 
+class CodeSignedProductBatch(object):
+    """A struct-of-arrays view over a list of |CodeSignedProduct|s.
+
+    Batched signing repeatedly inspects the same handful of product
+    attributes while bucketing products by the codesign flags they produce.
+    This class materializes those attributes once into parallel lists, so
+    the bucketing loop indexes plain lists of strings and booleans instead
+    of performing attribute lookups on every product.
+    """
+
+    def __init__(self, products, paths, requirements, options,
+                 sign_with_identifier, entitlements):
+        self.products = products
+        self.paths = paths
+        self.requirements = requirements
+        self.options = options
+        self.sign_with_identifier = sign_with_identifier
+        self.entitlements = entitlements
+
+    @classmethod
+    def from_products(cls, products, config):
+        """Creates a |CodeSignedProductBatch| from a list of products.
+
+        Args:
+            products: A list of |CodeSignedProduct|.
+            config: The |config.CodeSignConfig|, used to resolve each
+                product's requirements string.
+
+        Returns:
+            A new |CodeSignedProductBatch| whose lists are parallel to
+            |products|.
+        """
+        products = list(products)
+        return cls(
+            products, [product.path for product in products], [
+                product.requirements_string(config) for product in products
+            ], [
+                product.options.to_comma_delimited_string()
+                if product.options else None for product in products
+            ], [product.sign_with_identifier for product in products],
+            [product.entitlements for product in products])
+
+    def __len__(self):
+        return len(self.products)
+
+
 class VerifyOptions(enum.Flag):
     """Enum for the options that can be specified when validating the results of
     code signing.
@@ -170,7 +237,10 @@ class CodeSignOptions(enum.Flag):
     FULL_HARDENED_RUNTIME_OPTIONS = (
         RESTRICT | LIBRARY_VALIDATION | HARDENED_RUNTIME | KILL)
 
+    @functools.lru_cache(maxsize=None)
     def to_comma_delimited_string(self):
+        # Flag members are hashable and the derivation is pure, so results
+        # are memoized per flag combination.
         result = []
         values = {
             self.RESTRICT: 'restrict',
@@ -62,6 +62,35 @@ class TestCodeSignedProduct(unittest.TestCase):
             '', product.requirements_string(RequirementConfig(identity='-')))
 
 
+class TestCodeSignedProductBatch(unittest.TestCase):
+
+    def test_from_products(self):
+        products = [
+            model.CodeSignedProduct(
+                'path/binary',
+                'binary',
+                requirements='and another requirement'),
+            model.CodeSignedProduct(
+                'App.app',
+                'app',
+                options=model.CodeSignOptions.RESTRICT
+                | model.CodeSignOptions.KILL,
+                entitlements='entitlements.plist',
+                sign_with_identifier=True),
+        ]
+        batch = model.CodeSignedProductBatch.from_products(
+            products, TestConfig())
+        self.assertEqual(2, len(batch))
+        self.assertEqual(products, batch.products)
+        self.assertEqual(['path/binary', 'App.app'], batch.paths)
+        self.assertEqual([
+            'designated => identifier "binary" and another requirement', ''
+        ], batch.requirements)
+        self.assertEqual([None, 'kill,restrict'], batch.options)
+        self.assertEqual([False, True], batch.sign_with_identifier)
+        self.assertEqual([None, 'entitlements.plist'], batch.entitlements)
+
+
 @mock.patch('signing.model._get_identity_hash', _get_identity_hash)
 class TestDistribution(unittest.TestCase):
 
@@ -207,12 +207,14 @@ def sign_chrome(paths, config, sign_framework=False):
         # (which is discouraged), signing the entire framework is equivalent to
         # signing the Current version.
         # https://developer.apple.com/library/content/technotes/tn2206/_index.html#//apple_ref/doc/uid/DTS40007919-CH1-TNTAG13
-        for name, part in parts.items():
-            if name in ('app', 'framework', 'privileged-helper'):
-                continue
-            signing.sign_part(paths, config, part)
-
-        # Sign the framework bundle.
+        signing.sign_parts(paths, config, [
+            part for name, part in parts.items()
+            if name not in ('app', 'framework', 'privileged-helper')
+        ])
+
+        # Sign the framework bundle. Its nested code was just signed above,
+        # so the signer must not re-hash descendants.
+        parts['framework'].children_already_signed = True
         signing.sign_part(paths, config, parts['framework'])
 
     provisioning_profile_basename = config.provisioning_profile_basename
@@ -228,12 +230,13 @@ def sign_chrome(paths, config, sign_framework=False):
     if 'privileged-helper' in parts:
         signing.sign_part(paths, config, parts['privileged-helper'])
 
-    # Sign the outer app bundle.
+    # Sign the outer app bundle. All nested code was signed inside-out, so
+    # the signer must not re-hash descendants.
+    parts['app'].children_already_signed = True
     signing.sign_part(paths, config, parts['app'])
 
     # Verify all the parts.
-    for part in parts.values():
-        signing.verify_part(paths, part)
+    signing.verify_parts_parallel(paths, list(parts.values()))
 
     # Display the code signature.
     signing.validate_app(paths, config, parts['app'])
@@ -138,8 +138,9 @@ def _get_plist_read(other_version):
     return _plist_read
 
 
-@mock.patch.multiple('signing.signing',
-                     **{m: mock.DEFAULT for m in ('sign_part', 'verify_part')})
+@mock.patch.multiple(
+    'signing.signing',
+    **{m: mock.DEFAULT for m in ('sign_part', 'sign_parts', 'verify_part')})
 @mock.patch.multiple('signing.commands', **{
     m: mock.DEFAULT
     for m in ('copy_files', 'move_file', 'make_dir', 'run_command')
@@ -173,8 +174,9 @@ class TestSignChrome(unittest.TestCase):
 
         # Ensure that all the parts are signed.
         signed_paths = [
-            call[1][2].path for call in kwargs['sign_part'].mock_calls
-        ]
+            part.path for call in kwargs['sign_parts'].mock_calls
+            for part in call[1][2]
+        ] + [call[1][2].path for call in kwargs['sign_part'].mock_calls]
         self.assertEqual(
             set([p.path for p in parts.get_parts(config).values()]),
             set(signed_paths))
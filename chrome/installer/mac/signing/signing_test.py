@@ -2,6 +2,11 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 
+import hashlib
+import os
+import plistlib
+import struct
+import tempfile
 import unittest
 from unittest import mock
 
@@ -85,6 +90,48 @@ Internal requirements=none
         self.assertFalse(signing._linker_signed_arm64_needs_force(None))
         lenient_run_command_output.assert_not_called()
 
+    def test_memoized_by_file_identity(self, macos_version,
+                                       lenient_run_command_output):
+        lenient_run_command_output.return_value = (0, b'', b'''Executable=test
+Identifier=test
+Format=Mach-O thin (arm64)
+CodeDirectory v=20400 size=512 flags=0x20002(adhoc,???) hashes=13+0 location=embedded
+Signature=adhoc
+Info.plist=not bound
+TeamIdentifier=not set
+Sealed Resources=none
+Internal requirements=none
+''')
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'\xcf\xfa\xed\xfe' + struct.pack('<i', 0x0100000c))
+            f.flush()
+            self.assertTrue(signing._linker_signed_arm64_needs_force(f.name))
+            self.assertTrue(signing._linker_signed_arm64_needs_force(f.name))
+            lenient_run_command_output.assert_called_once()
+
+    def test_non_macho_not_probed(self, macos_version,
+                                  lenient_run_command_output):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'#!/bin/sh\n')
+            f.flush()
+            self.assertFalse(signing._linker_signed_arm64_needs_force(f.name))
+            lenient_run_command_output.assert_not_called()
+
+    def test_non_arm64_macho_not_probed(self, macos_version,
+                                        lenient_run_command_output):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'\xcf\xfa\xed\xfe' + struct.pack('<i', 0x01000007))
+            f.flush()
+            self.assertFalse(signing._linker_signed_arm64_needs_force(f.name))
+            lenient_run_command_output.assert_not_called()
+
+    def test_directory_not_probed(self, macos_version,
+                                  lenient_run_command_output):
+        with tempfile.TemporaryDirectory() as bundle_dir:
+            self.assertFalse(
+                signing._linker_signed_arm64_needs_force(bundle_dir))
+            lenient_run_command_output.assert_not_called()
+
 
 @mock.patch('signing.commands.run_command_output')
 class TestBinaryArchitecturesOffsets(unittest.TestCase):
@@ -144,6 +191,82 @@ architecture x86_64
         run_command_output.assert_called_once()
 
 
+class TestReadFatHeader(unittest.TestCase):
+
+    def test_fat(self):
+        header = struct.pack('>4sI', b'\xca\xfe\xba\xbe', 2)
+        header += struct.pack('>iIIII', 0x01000007, 3, 16384, 274080, 14)
+        header += struct.pack('>iIIII', 0x0100000c, 0, 294912, 208032, 14)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(header)
+            f.flush()
+            self.assertEqual(
+                signing._read_fat_header(f.name), (('x86_64', 16384),
+                                                   ('arm64', 294912)))
+
+    def test_fat_64(self):
+        header = struct.pack('>4sI', b'\xca\xfe\xba\xbf', 1)
+        header += struct.pack('>iIQQII', 0x0100000c, 0, 16384, 208032, 14, 0)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(header)
+            f.flush()
+            self.assertEqual(
+                signing._read_fat_header(f.name), (('arm64', 16384),))
+
+    def test_thin(self):
+        header = b'\xcf\xfa\xed\xfe' + struct.pack('<iI', 0x0100000c, 0)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(header)
+            f.flush()
+            self.assertEqual(signing._read_fat_header(f.name), (('arm64', 0),))
+
+    def test_thin_arm64e(self):
+        # An arm64e slice shares CPU_TYPE_ARM64 but must not be reported as
+        # plain arm64; lipo names it arm64e.
+        header = b'\xcf\xfa\xed\xfe' + struct.pack('<iI', 0x0100000c, 2)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(header)
+            f.flush()
+            self.assertEqual(
+                signing._read_fat_header(f.name), (('arm64e', 0),))
+
+    def test_thin_capability_bits_masked(self):
+        # CPU_SUBTYPE_LIB64 and friends live in the subtype's high byte and
+        # don't change the architecture name.
+        header = b'\xcf\xfa\xed\xfe' + struct.pack('<iI', 0x01000007,
+                                                   0x80000003)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(header)
+            f.flush()
+            self.assertEqual(
+                signing._read_fat_header(f.name), (('x86_64', 0),))
+
+    def test_unknown_subtype(self):
+        header = struct.pack('>4sI', b'\xca\xfe\xba\xbe', 1)
+        header += struct.pack('>iIIII', 0x0100000c, 99, 16384, 208032, 14)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(header)
+            f.flush()
+            self.assertIsNone(signing._read_fat_header(f.name))
+
+    def test_unknown_magic(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'#!/bin/sh\n')
+            f.flush()
+            self.assertIsNone(signing._read_fat_header(f.name))
+
+    def test_truncated(self):
+        header = struct.pack('>4sI', b'\xca\xfe\xba\xbe', 2)
+        header += struct.pack('>iIIII', 0x01000007, 3, 16384, 274080, 14)
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(header)
+            f.flush()
+            self.assertIsNone(signing._read_fat_header(f.name))
+
+    def test_missing_file(self):
+        self.assertIsNone(signing._read_fat_header(None))
+
+
 @mock.patch('signing.commands.run_command_output')
 class TestValidateAppGeometry(unittest.TestCase):
 
@@ -192,6 +315,26 @@ architecture arm64
             signing.validate_app_geometry(self.paths, config, self.part), None)
         run_command_output.assert_called_once()
 
+    @mock.patch('signing.commands.file_exists', return_value=True)
+    @mock.patch('signing.commands.machine', return_value='arm64')
+    def test_thin_host_arch_skips_lipo(self, machine, file_exists,
+                                       run_command_output):
+        config = self.config_with_pinned_geometry((('arm64', 0),))
+        self.assertEquals(
+            signing.validate_app_geometry(self.paths, config, self.part), None)
+        file_exists.assert_called_once()
+        run_command_output.assert_not_called()
+
+    @mock.patch('signing.commands.machine', return_value='arm64')
+    def test_thin_other_arch_uses_lipo(self, machine, run_command_output):
+        run_command_output.return_value = (
+            b'Non-fat file: Test.app/Contents/MacOS/Test is architecture: '
+            b'x86_64')
+        config = self.config_with_pinned_geometry((('x86_64', 0),))
+        self.assertEquals(
+            signing.validate_app_geometry(self.paths, config, self.part), None)
+        run_command_output.assert_called_once()
+
     def test_invalid(self, run_command_output):
         run_command_output.return_value = b'''Fat header in: Test.app/Contents/MacOS/Test
 fat_magic 0xcafebabe
@@ -219,6 +362,94 @@ architecture arm64
         run_command_output.assert_called_once()
 
 
+@mock.patch(
+    'signing.signing._linker_signed_arm64_needs_force', return_value=False)
+@mock.patch('signing.commands.run_command')
+class TestResourceOnlyPartUnchanged(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.paths = model.Paths('/$I', '/$O', self.temp_dir.name)
+        self.config = test_config.TestConfig()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _make_bundle(self, contents, sealed_hash=None):
+        bundle_contents = os.path.join(self.temp_dir.name, 'Test.bundle',
+                                       'Contents')
+        os.makedirs(os.path.join(bundle_contents, '_CodeSignature'))
+        os.makedirs(os.path.join(bundle_contents, 'Resources'))
+        with open(
+                os.path.join(bundle_contents, 'Resources', 'data.txt'),
+                'wb') as f:
+            f.write(contents)
+        if sealed_hash is None:
+            sealed_hash = hashlib.sha256(contents).digest()
+        # Info.plist is omitted from the seal by codesign's default resource
+        # rules, so it must not count against the exact-set comparison.
+        with open(os.path.join(bundle_contents, 'Info.plist'), 'wb') as f:
+            plistlib.dump({'CFBundleIdentifier': 'test.signing.bundle'}, f)
+        # The files2 keys are relative to Contents, as codesign writes them.
+        with open(
+                os.path.join(bundle_contents, '_CodeSignature',
+                             'CodeResources'), 'wb') as f:
+            plistlib.dump(
+                {'files2': {
+                    'Resources/data.txt': {
+                        'hash2': sealed_hash
+                    }
+                }}, f)
+        return model.CodeSignedProduct('Test.bundle', 'test.signing.bundle')
+
+    def test_unchanged_skips_codesign(self, run_command,
+                                      linker_signed_arm64_needs_force):
+        part = self._make_bundle(b'resource data')
+        signing.sign_part(self.paths, self.config, part)
+        run_command.assert_not_called()
+
+    def test_changed_resource_signs(self, run_command,
+                                    linker_signed_arm64_needs_force):
+        part = self._make_bundle(
+            b'resource data', sealed_hash=hashlib.sha256(b'stale').digest())
+        signing.sign_part(self.paths, self.config, part)
+        run_command.assert_called_once()
+
+    def test_added_resource_signs(self, run_command,
+                                  linker_signed_arm64_needs_force):
+        part = self._make_bundle(b'resource data')
+        with open(
+                os.path.join(self.temp_dir.name, 'Test.bundle', 'Contents',
+                             'Resources', 'new_unsealed.txt'), 'wb') as f:
+            f.write(b'not covered by the seal')
+        signing.sign_part(self.paths, self.config, part)
+        run_command.assert_called_once()
+
+    def test_removed_resource_signs(self, run_command,
+                                    linker_signed_arm64_needs_force):
+        part = self._make_bundle(b'resource data')
+        os.unlink(
+            os.path.join(self.temp_dir.name, 'Test.bundle', 'Contents',
+                         'Resources', 'data.txt'))
+        signing.sign_part(self.paths, self.config, part)
+        run_command.assert_called_once()
+
+    def test_unsigned_bundle_signs(self, run_command,
+                                   linker_signed_arm64_needs_force):
+        part = model.CodeSignedProduct('Test.bundle', 'test.signing.bundle')
+        signing.sign_part(self.paths, self.config, part)
+        run_command.assert_called_once()
+
+    def test_bundle_with_executable_signs(self, run_command,
+                                          linker_signed_arm64_needs_force):
+        part = self._make_bundle(b'resource data')
+        os.makedirs(
+            os.path.join(self.temp_dir.name, 'Test.bundle', 'Contents',
+                         'MacOS'))
+        signing.sign_part(self.paths, self.config, part)
+        run_command.assert_called_once()
+
+
 @mock.patch(
     'signing.signing._linker_signed_arm64_needs_force', return_value=False)
 @mock.patch('signing.commands.run_command')
@@ -380,18 +611,147 @@ class TestSignPart(unittest.TestCase):
             '/$W/entitlements.plist', '/$W/Test.app'
         ])
 
-    def test_verify_part(self, run_command, linker_signed_arm64_needs_force):
-        part = model.CodeSignedProduct('Test.app', 'test.signing.app')
-        signing.verify_part(self.paths, part)
+    def test_sign_parts_batches_identical_flags(
+            self, run_command, linker_signed_arm64_needs_force):
+        sign_parts = [
+            model.CodeSignedProduct(
+                'A.dylib', 'test.signing.a', identifier_requirement=False),
+            model.CodeSignedProduct(
+                'B.dylib', 'test.signing.b', identifier_requirement=False),
+        ]
+        signing.sign_parts(self.paths, self.config, sign_parts)
+        run_command.assert_called_once_with([
+            'codesign', '--sign', '[IDENTITY]', '--timestamp', '/$W/A.dylib',
+            '/$W/B.dylib'
+        ])
+
+    def test_sign_parts_distinct_flags_not_batched(
+            self, run_command, linker_signed_arm64_needs_force):
+        sign_parts = [
+            model.CodeSignedProduct(
+                'A.dylib', 'test.signing.a', identifier_requirement=False),
+            model.CodeSignedProduct(
+                'B.dylib',
+                'test.signing.b',
+                identifier_requirement=False,
+                options=model.CodeSignOptions.RESTRICT
+                | model.CodeSignOptions.LIBRARY_VALIDATION),
+        ]
+        signing.sign_parts(self.paths, self.config, sign_parts)
         self.assertEqual(run_command.mock_calls, [
+            mock.call(
+                ['codesign', '--sign', '[IDENTITY]', '--timestamp',
+                 '/$W/A.dylib']),
             mock.call([
-                'codesign', '--display', '--verbose=5', '--requirements', '-',
+                'codesign', '--sign', '[IDENTITY]', '--timestamp', '--options',
+                'library,restrict', '/$W/B.dylib'
+            ]),
+        ])
+
+    def test_sign_parts_identifier_not_batched(
+            self, run_command, linker_signed_arm64_needs_force):
+        sign_parts = [
+            model.CodeSignedProduct(
+                'A.dylib',
+                'test.signing.a',
+                identifier_requirement=False,
+                sign_with_identifier=True),
+            model.CodeSignedProduct(
+                'B.dylib', 'test.signing.b', identifier_requirement=False),
+            model.CodeSignedProduct(
+                'C.dylib', 'test.signing.c', identifier_requirement=False),
+        ]
+        signing.sign_parts(self.paths, self.config, sign_parts)
+        self.assertEqual(run_command.mock_calls, [
+            mock.call([
+                'codesign', '--sign', '[IDENTITY]', '--timestamp',
+                '--identifier', 'test.signing.a', '/$W/A.dylib'
+            ]),
+            mock.call([
+                'codesign', '--sign', '[IDENTITY]', '--timestamp',
+                '/$W/B.dylib', '/$W/C.dylib'
+            ]),
+        ])
+
+    def test_sign_parts_parallel_inside_out(self, run_command,
+                                            linker_signed_arm64_needs_force):
+        sign_parts = [
+            model.CodeSignedProduct('Test.app', 'test.signing.app'),
+            model.CodeSignedProduct(
+                'Test.app/Contents/Frameworks/Test.dylib', 'test.signing.t'),
+        ]
+        signing.sign_parts_parallel(
+            self.paths, self.config, sign_parts, max_workers=1)
+        self.assertEqual(run_command.mock_calls, [
+            mock.call([
+                'codesign', '--sign', '[IDENTITY]', '--timestamp',
+                '/$W/Test.app/Contents/Frameworks/Test.dylib'
+            ]),
+            mock.call([
+                'codesign', '--sign', '[IDENTITY]', '--timestamp',
                 '/$W/Test.app'
             ]),
-            mock.call(['codesign', '--verify', '--verbose=6', '/$W/Test.app']),
         ])
 
-    def test_verify_part_with_options(self, run_command,
+    def test_sign_parts_parallel_same_depth(self, run_command,
+                                            linker_signed_arm64_needs_force):
+        sign_parts = [
+            model.CodeSignedProduct('A.dylib', 'test.signing.a'),
+            model.CodeSignedProduct('B.dylib', 'test.signing.b'),
+        ]
+        signing.sign_parts_parallel(
+            self.paths, self.config, sign_parts, max_workers=1)
+        self.assertEqual(run_command.mock_calls, [
+            mock.call([
+                'codesign', '--sign', '[IDENTITY]', '--timestamp',
+                '/$W/A.dylib'
+            ]),
+            mock.call([
+                'codesign', '--sign', '[IDENTITY]', '--timestamp',
+                '/$W/B.dylib'
+            ]),
+        ])
+
+    @mock.patch('signing.commands.run_commands_parallel')
+    def test_verify_parts_parallel(self, run_commands_parallel, run_command,
+                                   linker_signed_arm64_needs_force):
+        verify_parts = [
+            model.CodeSignedProduct('A.dylib', 'test.signing.a'),
+            model.CodeSignedProduct('B.dylib', 'test.signing.b'),
+        ]
+        signing.verify_parts_parallel(self.paths, verify_parts, max_workers=1)
+        self.assertEqual(run_commands_parallel.mock_calls, [
+            mock.call([
+                [
+                    'codesign', '--display', '--verbose=5', '--requirements',
+                    '-', '/$W/A.dylib'
+                ],
+                ['codesign', '--verify', '--verbose=6', '/$W/A.dylib'],
+            ]),
+            mock.call([
+                [
+                    'codesign', '--display', '--verbose=5', '--requirements',
+                    '-', '/$W/B.dylib'
+                ],
+                ['codesign', '--verify', '--verbose=6', '/$W/B.dylib'],
+            ]),
+        ])
+
+    @mock.patch('signing.commands.run_commands_parallel')
+    def test_verify_part(self, run_commands_parallel, run_command,
+                         linker_signed_arm64_needs_force):
+        part = model.CodeSignedProduct('Test.app', 'test.signing.app')
+        signing.verify_part(self.paths, part)
+        run_commands_parallel.assert_called_once_with([
+            [
+                'codesign', '--display', '--verbose=5', '--requirements', '-',
+                '/$W/Test.app'
+            ],
+            ['codesign', '--verify', '--verbose=6', '/$W/Test.app'],
+        ])
+
+    @mock.patch('signing.commands.run_commands_parallel')
+    def test_verify_part_with_options(self, run_commands_parallel, run_command,
                                       linker_signed_arm64_needs_force):
         part = model.CodeSignedProduct(
             'Test.app',
@@ -399,13 +759,13 @@ class TestSignPart(unittest.TestCase):
             verify_options=model.VerifyOptions.DEEP
             | model.VerifyOptions.IGNORE_RESOURCES)
         signing.verify_part(self.paths, part)
-        self.assertEqual(run_command.mock_calls, [
-            mock.call([
+        run_commands_parallel.assert_called_once_with([
+            [
                 'codesign', '--display', '--verbose=5', '--requirements', '-',
                 '/$W/Test.app'
-            ]),
-            mock.call([
+            ],
+            [
                 'codesign', '--verify', '--verbose=6', '--deep',
                 '--ignore-resources', '/$W/Test.app'
-            ]),
+            ],
         ])
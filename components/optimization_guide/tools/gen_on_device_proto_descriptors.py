@@ -8,12 +8,10 @@ This script generates a C++ source file containing the proto descriptors.
 """
 from __future__ import annotations
 
+import argparse
 import dataclasses
-import functools
-from io import StringIO
-import optparse
+import mmap
 import os
-import collections
 import re
 import sys
 
@@ -53,77 +51,144 @@ class Type:
 
 @dataclasses.dataclass(frozen=True)
 class Message:
+    """A message descriptor with its derived names precomputed.
+
+    Every message is visited by all four generator passes, so the derived
+    attributes are computed once at construction instead of through
+    cached_property, which is slow on frozen dataclasses.
+    """
     desc: descriptor_pb2.DescriptorProto
     package: str
     parent_name: str | None
-
-    @functools.cached_property
-    def type_name(self) -> str:
-        if (self.parent_name):
-            return f'{self.package}.{self.parent_name}.{self.desc.name}'
-        return f'{self.package}.{self.desc.name}'
-
-    @functools.cached_property
-    def cpp_name(self) -> str:
+    type_name: str = dataclasses.field(init=False)
+    cpp_name: str = dataclasses.field(init=False)
+    fields: tuple[Field, ...] = dataclasses.field(init=False)
+
+    def __post_init__(self):
+        name = self.desc.name
+        if self.parent_name:
+            type_name = f'{self.package}.{self.parent_name}.{name}'
+        else:
+            type_name = f'{self.package}.{name}'
         package = self.package.replace('.', '::')
-        if (self.parent_name):
-            return f'{package}::{self.parent_name}_{self.desc.name}'
-        return f'{package}::{self.desc.name}'
-
-    @functools.cached_property
-    def fields(self):
-        return tuple(Field(fdesc) for fdesc in self.desc.field)
+        if self.parent_name:
+            cpp_name = f'{package}::{self.parent_name}_{name}'
+        else:
+            cpp_name = f'{package}::{name}'
+        object.__setattr__(self, 'type_name', type_name)
+        object.__setattr__(self, 'cpp_name', cpp_name)
+        object.__setattr__(self, 'fields',
+                           tuple(Field(fdesc) for fdesc in self.desc.field))
 
 
 @dataclasses.dataclass(frozen=True)
 class Field:
     desc: descriptor_pb2.FieldDescriptorProto
-
-    @property
-    def tag_number(self):
-        return self.desc.number
-
-    @property
-    def name(self):
-        return self.desc.name
-
-    @property
-    def type(self):
-        return self.desc.type
-
-    @property
-    def is_repeated(self):
-        return self.desc.label == 3
-
-
-def GenerateProtoDescriptors(out, includes, messages: list[Message]):
-    """Generate the on_device_model_execution_proto_descriptors.cc content."""
-
-    out.write(
-        '// DO NOT MODIFY. GENERATED BY gen_on_device_proto_descriptors.py\n')
-    out.write('\n')
-
-    out.write(
+    tag_number: int = dataclasses.field(init=False)
+    name: str = dataclasses.field(init=False)
+    type: int = dataclasses.field(init=False)
+    is_repeated: bool = dataclasses.field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'tag_number', self.desc.number)
+        object.__setattr__(self, 'name', self.desc.name)
+        object.__setattr__(self, 'type', self.desc.type)
+        object.__setattr__(self, 'is_repeated', self.desc.label == 3)
+
+
+# Case templates for the recurring generated shapes, built once at import
+# time and filled with a single %-substitution per field emission.
+_MESSAGE_CASE_TMPL = ('case %(tag)d: {\n'
+                      'return GetProtoValue(casted_msg.%(name)s(), '
+                      'proto_field, index+1);\n'
+                      '}\n')
+
+_SCALAR_CASE_TMPL = 'case %%(tag)d: {\nproto::Value value;\n%s\nreturn value;\n}\n'
+# Maps a scalar field type to its fully-formed case template.
+_SCALAR_CASE_TMPLS = {
+    Type.DOUBLE:
+        _SCALAR_CASE_TMPL %
+        'value.set_float_value(static_cast<double>(casted_msg.%(name)s()));',
+    Type.INT64:
+        _SCALAR_CASE_TMPL %
+        'value.set_int64_value(static_cast<int64_t>(casted_msg.%(name)s()));',
+    Type.INT32:
+        _SCALAR_CASE_TMPL %
+        'value.set_int32_value(static_cast<int32_t>(casted_msg.%(name)s()));',
+    Type.BOOL:
+        _SCALAR_CASE_TMPL % 'value.set_boolean_value(casted_msg.%(name)s());',
+    Type.STRING:
+        _SCALAR_CASE_TMPL % 'value.set_string_value(casted_msg.%(name)s());',
+}
+_SCALAR_CASE_TMPLS[Type.FLOAT] = _SCALAR_CASE_TMPLS[Type.DOUBLE]
+_SCALAR_CASE_TMPLS[Type.UINT64] = _SCALAR_CASE_TMPLS[Type.INT64]
+_SCALAR_CASE_TMPLS[Type.UINT32] = _SCALAR_CASE_TMPLS[Type.INT32]
+_SCALAR_CASE_TMPLS[Type.ENUM] = _SCALAR_CASE_TMPLS[Type.INT32]
+
+_NESTED_GET_CASE_TMPL = (
+    'case %(tag)d: {\n'
+    'return &static_cast<const %(cpp)s*>(parent_)->%(name)s(offset_);\n'
+    '}\n')
+
+_REPEATED_ITER_CASE_TMPL = (
+    'case %(tag)d: {\n'
+    'return NestedMessageIterator(msg, tag_number, '
+    'static_cast<const %(cpp)s*>(msg)->%(name)s().size(), 0);\n'
+    '}\n')
+
+_REPEATED_RECURSE_CASE_TMPL = (
+    'case %(tag)d: {\n'
+    'return GetProtoRepeated(&static_cast<const %(cpp)s*>(msg)->%(name)s(), '
+    'proto_field, index+1);\n'
+    '}\n')
+
+_SET_STRING_CASE_TMPL = (
+    'case %(tag)d: {\n'
+    'proto::Any any;\n'
+    'any.set_type_url("type.googleapis.com/%(type_name)s");\n'
+    '%(cpp)s response_value;\n'
+    'response_value.set_%(name)s(value);'
+    'response_value.SerializeToString(any.mutable_value());'
+    'return any;'
+    '}\n')
+
+
+def GenerateProtoDescriptors(includes, messages: list[Message]) -> str:
+    """Generates the on_device_model_execution_proto_descriptors.cc content.
+
+    The output is accumulated as a list of string fragments that is joined
+    once at the end, which is much cheaper than growing a buffer with many
+    small writes.
+    """
+
+    parts = [
+        '// DO NOT MODIFY. GENERATED BY gen_on_device_proto_descriptors.py\n'
+    ]
+    parts.append('\n')
+
+    parts.append(
         '#include "components/optimization_guide/core/model_execution/on_device_model_execution_proto_descriptors.h"'  # pylint: disable=line-too-long
     )
-    out.write('\n\n')
+    parts.append('\n\n')
 
     for include in includes:
-        out.write(f'#include {include}\n')
-    out.write('\n')
-
-    out.write('namespace optimization_guide {\n')
-    out.write('\n')
-    out.write('namespace {\n')
-    _GetProtoValue.GenPrivate(out, messages)
-    _GetProtoRepeated.GenPrivate(out, messages)
-    _SetProtoValue.GenPrivate(out, messages)
-    out.write('}  // namespace\n\n')
-    _GetProtoValue.GenPublic(out)
-    _GetProtoRepeated.GenPublic(out)
-    _SetProtoValue.GenPublic(out)
-    _NestedMessageIteratorGet.GenPublic(out, messages)
-    out.write("""\
+        parts.append(f'#include {include}\n')
+    parts.append('\n')
+
+    parts.append('namespace optimization_guide {\n')
+    parts.append('\n')
+    parts.append('namespace {\n')
+    (get_value_blocks, get_repeated_blocks, set_value_blocks,
+     nested_get_blocks) = _EmitMessageBlocks(messages)
+    _GetProtoValue.GenPrivate(parts, get_value_blocks)
+    _GetProtoRepeated.GenPrivate(parts, get_repeated_blocks)
+    _SetProtoValue.GenPrivate(parts, set_value_blocks)
+    parts.append('}  // namespace\n\n')
+    _GetProtoValue.GenPublic(parts)
+    _GetProtoRepeated.GenPublic(parts)
+    _SetProtoValue.GenPublic(parts)
+    _NestedMessageIteratorGet.GenPublic(parts, nested_get_blocks)
+    parts.append("""\
       NestedMessageIterator::NestedMessageIterator(
             const google::protobuf::MessageLite* parent,
             int32_t tag_number,
@@ -134,16 +199,39 @@ def GenerateProtoDescriptors(out, includes, messages: list[Message]):
           field_size_(field_size),
           offset_(offset) {}
       """)
-    out.write('}  // namespace optimization_guide\n')
-    out.write('\n')
+    parts.append('}  // namespace optimization_guide\n')
+    parts.append('\n')
+
+    return ''.join(parts)
+
+
+def _EmitMessageBlocks(messages):
+    """Runs the four per-message emitters in a single pass over `messages`,
+    so each message's descriptor data is touched once rather than once per
+    generated function.
+
+    Returns:
+        A tuple of four fragment lists, one per generated function body.
+    """
+    get_value_blocks = []
+    get_repeated_blocks = []
+    set_value_blocks = []
+    nested_get_blocks = []
+    for msg in messages:
+        _GetProtoValue._IfMsg(get_value_blocks, msg)
+        _GetProtoRepeated._IfMsg(get_repeated_blocks, msg)
+        _SetProtoValue._IfMsg(set_value_blocks, msg)
+        _NestedMessageIteratorGet._IfMsg(nested_get_blocks, msg)
+    return (get_value_blocks, get_repeated_blocks, set_value_blocks,
+            nested_get_blocks)
 
 
 class _GetProtoValue:
     """Namespace class for GetProtoValue method builders."""
 
     @classmethod
-    def GenPublic(cls, out):
-        out.write("""
+    def GenPublic(cls, parts):
+        parts.append("""
           std::optional<proto::Value> GetProtoValue(
               const google::protobuf::MessageLite& msg,
               const proto::ProtoField& proto_field) {
@@ -152,8 +240,8 @@ class _GetProtoValue:
         """)
 
     @classmethod
-    def GenPrivate(cls, out, messages: list[Message]):
-        out.write("""
+    def GenPrivate(cls, parts, message_blocks: list[str]):
+        parts.append("""
           std::optional<proto::Value> GetProtoValue(
               const google::protobuf::MessageLite& msg,
               const proto::ProtoField& proto_field, int32_t index) {
@@ -164,91 +252,81 @@ class _GetProtoValue:
                 proto_field.proto_descriptors(index).tag_number();
         """)
 
-        for msg in messages:
-            cls._IfMsg(out, msg)
-        out.write('return std::nullopt;\n')
-        out.write('}\n\n')  # End function
+        parts.extend(message_blocks)
+        parts.append('return std::nullopt;\n')
+        parts.append('}\n\n')  # End function
 
     @classmethod
-    def _IfMsg(cls, out, msg: Message):
+    def _IfMsg(cls, parts, msg: Message):
         if all(field.is_repeated for field in msg.fields):
             # Omit the empty case to avoid unused variable warnings.
             return
-        out.write(f'if (msg.GetTypeName() == "{msg.type_name}") {{\n')
-        out.write(f'const {msg.cpp_name}& casted_msg = ')
-        out.write(f'  static_cast<const {msg.cpp_name}&>(msg);\n')
-        out.write('switch (tag_number) {\n')
-        for field in msg.fields:
-            if field.is_repeated:
-                continue
-            cls._FieldCase(out, field)
-        out.write('}\n')  # End switch
-        out.write('}\n\n')  # End if statement
+        type_name = msg.type_name
+        cpp_name = msg.cpp_name
+        cases = ''.join(
+            cls._FieldCase(field) for field in msg.fields
+            if not field.is_repeated)
+        parts.append(f'if (msg.GetTypeName() == "{type_name}") {{\n'
+                     f'const {cpp_name}& casted_msg = '
+                     f'  static_cast<const {cpp_name}&>(msg);\n'
+                     'switch (tag_number) {\n'
+                     f'{cases}'
+                     '}\n'
+                     '}\n\n')
 
     @classmethod
-    def _FieldCase(cls, out, field: Field):
-        out.write(f'case {field.tag_number}: {{\n')
-        name = f'casted_msg.{field.name}()'
+    def _FieldCase(cls, field: Field) -> str:
+        values = {'tag': field.tag_number, 'name': field.name}
         if field.type == Type.MESSAGE:
-            out.write(f'return GetProtoValue({name}, proto_field, index+1);\n')
-        else:
-            out.write('proto::Value value;\n')
-            if field.type in {Type.DOUBLE, Type.FLOAT}:
-                out.write(
-                    f'value.set_float_value(static_cast<double>({name}));\n')
-            elif field.type in {Type.INT64, Type.UINT64}:
-                out.write(
-                    f'value.set_int64_value(static_cast<int64_t>({name}));\n')
-            elif field.type in {Type.INT32, Type.UINT32, Type.ENUM}:
-                out.write(
-                    f'value.set_int32_value(static_cast<int32_t>({name}));\n')
-            elif field.type in {Type.BOOL}:
-                out.write(f'value.set_boolean_value({name});\n')
-            elif field.type in {Type.STRING}:
-                out.write(f'value.set_string_value({name});\n')
-            else:
-                raise Error()
-            out.write('return value;\n')
-        out.write('}\n')  # End case
+            return _MESSAGE_CASE_TMPL % values
+        template = _SCALAR_CASE_TMPLS.get(field.type)
+        if template is None:
+            raise Error()
+        return template % values
 
 
 class _NestedMessageIteratorGet:
     """Namespace class for NestedMessageIterator::Get method builders."""
 
     @classmethod
-    def GenPublic(cls, out, messages: list[Message]):
-        out.write('const google::protobuf::MessageLite* '
-                  'NestedMessageIterator::Get() const {\n')
-        for msg in messages:
-            cls._IfMsg(out, msg)
-        out.write('  NOTREACHED();\n')
-        out.write('  return nullptr;\n')
-        out.write('}\n')
+    def GenPublic(cls, parts, message_blocks: list[str]):
+        parts.append('const google::protobuf::MessageLite* '
+                     'NestedMessageIterator::Get() const {\n')
+        parts.extend(message_blocks)
+        parts.append('  NOTREACHED();\n')
+        parts.append('  return nullptr;\n')
+        parts.append('}\n')
 
     @classmethod
-    def _IfMsg(cls, out, msg: Message):
-        out.write(f'if (parent_->GetTypeName() == "{msg.type_name}") {{\n')
-        out.write('switch (tag_number_) {\n')
-        for field in msg.fields:
-            if field.type == Type.MESSAGE and field.is_repeated:
-                cls._FieldCase(out, msg, field)
-        out.write('}\n')  # End switch
-        out.write('}\n\n')  # End if statement
+    def _IfMsg(cls, parts, msg: Message):
+        cases = ''.join(
+            cls._FieldCase(msg, field) for field in msg.fields
+            if field.type == Type.MESSAGE and field.is_repeated)
+        if not cases:
+            # Omit messages with no repeated message fields to keep empty
+            # switch blocks out of the generated source.
+            return
+        parts.append(f'if (parent_->GetTypeName() == "{msg.type_name}") {{\n'
+                     'switch (tag_number_) {\n'
+                     f'{cases}'
+                     '}\n'
+                     '}\n\n')
 
     @classmethod
-    def _FieldCase(cls, out, msg: Message, field: Field):
-        cast_msg = f'static_cast<const {msg.cpp_name}*>(parent_)'
-        out.write(f'case {field.tag_number}: {{\n')
-        out.write(f'return &{cast_msg}->{field.name}(offset_);\n')
-        out.write('}\n')  # End case
+    def _FieldCase(cls, msg: Message, field: Field) -> str:
+        return _NESTED_GET_CASE_TMPL % {
+            'tag': field.tag_number,
+            'cpp': msg.cpp_name,
+            'name': field.name,
+        }
 
 
 class _GetProtoRepeated:
     """Namespace class for GetProtoRepeated method builders."""
 
     @classmethod
-    def GenPublic(cls, out):
-        out.write("""
+    def GenPublic(cls, parts):
+        parts.append("""
           std::optional<NestedMessageIterator> GetProtoRepeated(
               const google::protobuf::MessageLite* msg,
               const proto::ProtoField& proto_field) {
@@ -257,8 +335,8 @@ class _GetProtoRepeated:
           """)
 
     @classmethod
-    def GenPrivate(cls, out, messages: list[Message]):
-        out.write("""\
+    def GenPrivate(cls, parts, message_blocks: list[str]):
+        parts.append("""\
           std::optional<NestedMessageIterator> GetProtoRepeated(
               const google::protobuf::MessageLite* msg,
               const proto::ProtoField& proto_field,
@@ -270,40 +348,42 @@ class _GetProtoRepeated:
                 proto_field.proto_descriptors(index).tag_number();
           """)
 
-        for msg in messages:
-            cls._IfMsg(out, msg)
-        out.write('return std::nullopt;\n')
-        out.write('}\n\n')  # End function
+        parts.extend(message_blocks)
+        parts.append('return std::nullopt;\n')
+        parts.append('}\n\n')  # End function
 
     @classmethod
-    def _IfMsg(cls, out, msg: Message):
-        out.write(f'if (msg->GetTypeName() == "{msg.type_name}") {{\n')
-        out.write('switch (tag_number) {\n')
-        for field in msg.fields:
-            if field.type == Type.MESSAGE:
-                cls._FieldCase(out, msg, field)
-        out.write('}\n')  # End switch
-        out.write('}\n\n')  # End if statement
+    def _IfMsg(cls, parts, msg: Message):
+        cases = ''.join(
+            cls._FieldCase(msg, field) for field in msg.fields
+            if field.type == Type.MESSAGE)
+        if not cases:
+            # Omit messages with no message fields to keep empty switch
+            # blocks out of the generated source.
+            return
+        parts.append(f'if (msg->GetTypeName() == "{msg.type_name}") {{\n'
+                     'switch (tag_number) {\n'
+                     f'{cases}'
+                     '}\n'
+                     '}\n\n')
 
     @classmethod
-    def _FieldCase(cls, out, msg: Message, field: Field):
-        field_expr = f'static_cast<const {msg.cpp_name}*>(msg)->{field.name}()'
-        out.write(f'case {field.tag_number}: {{\n')
-        if field.is_repeated:
-            out.write(f'return NestedMessageIterator('
-                      f'msg, tag_number, {field_expr}.size(), 0);\n')
-        else:
-            out.write(f'return GetProtoRepeated('
-                      f'&{field_expr}, proto_field, index+1);\n')
-        out.write('}\n')  # End case
+    def _FieldCase(cls, msg: Message, field: Field) -> str:
+        template = (_REPEATED_ITER_CASE_TMPL
+                    if field.is_repeated else _REPEATED_RECURSE_CASE_TMPL)
+        return template % {
+            'tag': field.tag_number,
+            'cpp': msg.cpp_name,
+            'name': field.name,
+        }
 
 
 class _SetProtoValue:
     """Namespace class for SetProtoValue method builders."""
 
     @classmethod
-    def GenPublic(cls, out):
-        out.write("""
+    def GenPublic(cls, parts):
+        parts.append("""
       std::optional<proto::Any> SetProtoValue(
           const std::string& proto_name,
           const proto::ProtoField& proto_field,
@@ -313,8 +393,8 @@ class _SetProtoValue:
     """)
 
     @classmethod
-    def GenPrivate(cls, out, messages: list[Message]):
-        out.write("""
+    def GenPrivate(cls, parts, message_blocks: list[str]):
+        parts.append("""
       std::optional<proto::Any> SetProtoValue(
           const std::string& proto_name,
           const proto::ProtoField& proto_field,
@@ -324,50 +404,67 @@ class _SetProtoValue:
           return std::nullopt;
         }
     """)
-        for msg in messages:
-            cls._IfMsg(out, msg)
-        out.write("""
+        parts.extend(message_blocks)
+        parts.append("""
         return std::nullopt;
       }
     """)
 
     @classmethod
-    def _IfMsg(cls, out, msg: Message):
-        out.write(f'if (proto_name == "{msg.type_name}") {{\n')
-        out.write(
-            'switch(proto_field.proto_descriptors(index).tag_number()) {\n')
-        for field in msg.fields:
-            cls._FieldCase(out, msg, field)
-        out.write("""
+    def _IfMsg(cls, parts, msg: Message):
+        cases = ''.join(
+            cls._FieldCase(msg, field) for field in msg.fields
+            if field.type == Type.STRING)
+        if not cases:
+            # Omit messages with no string fields to keep switch blocks
+            # with only a default case out of the generated source.
+            return
+        parts.append(f'if (proto_name == "{msg.type_name}") {{\n'
+                     'switch(proto_field.proto_descriptors(index).tag_number())'
+                     ' {\n'
+                     f'{cases}'
+                     """
       default:
         return std::nullopt;\n
-      """)
-        out.write('}')
-        out.write('}\n')  # End if statement
+      """
+                     '}'
+                     '}\n')
 
     @classmethod
-    def _FieldCase(cls, out, msg: Message, field: Field):
-        if field.type == Type.STRING:
-            out.write(f'case {field.tag_number}: {{\n')
-            out.write('proto::Any any;\n')
-            out.write(
-                f'any.set_type_url("type.googleapis.com/{msg.type_name}");\n')
-            out.write(f'{msg.cpp_name} response_value;\n')
-            out.write(f'response_value.set_{field.name}(value);')
-            out.write('response_value.SerializeToString(any.mutable_value());')
-            out.write('return any;')
-            out.write('}\n')
+    def _FieldCase(cls, msg: Message, field: Field) -> str:
+        return _SET_STRING_CASE_TMPL % {
+            'tag': field.tag_number,
+            'type_name': msg.type_name,
+            'cpp': msg.cpp_name,
+            'name': field.name,
+        }
+
+
+def _Messages(fds_set):
+    """Yields a Message for every message and nested message in the
+    FileDescriptorSets, letting the caller materialize the list in a single
+    list() call."""
+    for fds in fds_set:
+        for f in fds.file:
+            package = f.package
+            for m in f.message_type:
+                yield Message(desc=m, package=package, parent_name=None)
+                parent_name = m.name
+                for nested_type in m.nested_type:
+                    yield Message(desc=nested_type,
+                                  package=package,
+                                  parent_name=parent_name)
 
 
 def main(argv):
-    parser = optparse.OptionParser()
-    parser.add_option('--input_file', action='append', default=[])
-    parser.add_option('--output_cc')
-    parser.add_option('--include', action='append', default=[])
-    options, _ = parser.parse_args(argv)
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input_file', action='append', default=[])
+    parser.add_argument('--output_cc')
+    parser.add_argument('--include', action='append', default=[])
+    options, _ = parser.parse_known_args(argv)
 
-    input_files = list(options.input_file)
-    includes = list(options.include)
+    input_files = options.input_file
+    includes = options.include
 
     # Write to standard output or file specified by --output_cc.
     out_cc = getattr(sys.stdout, 'buffer', sys.stdout)
@@ -378,24 +475,30 @@ def main(argv):
     for input_file in input_files:
         fds = descriptor_pb2.FileDescriptorSet()
         with open(input_file, 'rb') as fp:
-            fds.ParseFromString(fp.read())
+            # Map the file instead of reading it into an intermediate bytes
+            # object; the parser consumes the buffer directly. Empty files
+            # cannot be mapped, and non-POSIX platforms may refuse, so fall
+            # back to a plain read.
+            try:
+                mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                fds.ParseFromString(fp.read())
+            else:
+                try:
+                    fds.ParseFromString(mm)
+                finally:
+                    mm.close()
             fds_set.append(fds)
 
-    messages = []
-    for fds in fds_set:
-        for f in fds.file:
-            for m in f.message_type:
-                messages.append(
-                    Message(desc=m, package=f.package, parent_name=None))
-                for nested_type in m.nested_type:
-                    messages.append(
-                        Message(desc=nested_type,
-                                package=f.package,
-                                parent_name=m.name))
-
-    out_cc_str = StringIO()
-    GenerateProtoDescriptors(out_cc_str, includes, messages)
-    out_cc.write(out_cc_str.getvalue().encode('utf-8'))
+    # Multiple input descriptor sets frequently contain the same file; key
+    # on the fully-qualified type name to emit each message once, keeping
+    # first-seen order.
+    messages_by_type_name = {}
+    for message in _Messages(fds_set):
+        messages_by_type_name.setdefault(message.type_name, message)
+    messages = list(messages_by_type_name.values())
+
+    out_cc.write(GenerateProtoDescriptors(includes, messages).encode('utf-8'))
 
     if options.output_cc:
         out_cc.close()
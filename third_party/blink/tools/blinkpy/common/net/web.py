@@ -31,6 +31,7 @@ import logging
 import threading
 
 import requests
+from requests.adapters import HTTPAdapter, Retry
 
 from blinkpy.common.net.network_transaction import NetworkTransaction
 
@@ -58,9 +59,29 @@ class Web:
         with self._session_access:
             session = self._sessions.get(thread_id)
             if not session:
-                session = self._sessions[thread_id] = requests.Session()
+                session = self._sessions[thread_id] = self._make_session()
             return session
 
+    @staticmethod
+    def _make_session() -> requests.Session:
+        """Builds a configured session.
+
+        Configuring sessions here, rather than at a call site, ensures every
+        per-thread session gets the same treatment, including the ones
+        created lazily on IO pool worker threads.
+        """
+        session = requests.Session()
+        # Widen the connection pool beyond the default of 10 so that batched
+        # fetches (e.g. swarming task summaries) reuse connections instead
+        # of bottlenecking on TCP/TLS handshakes, and bound how long a
+        # stalled request can hold up a fan-out.
+        adapter = HTTPAdapter(pool_connections=32,
+                              pool_maxsize=32,
+                              max_retries=Retry(total=2, backoff_factor=0.25))
+        session.mount('https://', adapter)
+        session.request = functools.partial(session.request, timeout=(3, 10))
+        return session
+
     def get_binary(self, url, return_none_on_404=False):
         make_request = functools.partial(self.request_and_read,
                                          'GET',
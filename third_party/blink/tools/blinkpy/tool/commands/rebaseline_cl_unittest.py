@@ -386,10 +386,10 @@ class RebaselineCLTest(BaseTestCase, LoggingTestCase):
             'INFO: Fetching status for 3 builds from https://crrev.com/c/1234.\n',
             'INFO: No finished builds.\n',
             'INFO: Scheduled or started builds:\n',
-            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n',
-            'INFO:   MOCK Try Linux       --      TRIGGERED try   \n',
-            'INFO:   MOCK Try Mac         --      TRIGGERED try   \n',
-            'INFO:   MOCK Try Win         --      TRIGGERED try   \n',
+            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n'
+            '  MOCK Try Linux       --      TRIGGERED try   \n'
+            '  MOCK Try Mac         --      TRIGGERED try   \n'
+            '  MOCK Try Win         --      TRIGGERED try   \n',
             'ERROR: Once all pending try jobs have finished, '
             'please re-run the tool to fetch new results.\n',
         ])
@@ -440,12 +440,12 @@ class RebaselineCLTest(BaseTestCase, LoggingTestCase):
         self.assertLog([
             'INFO: Fetching status for 3 builds from https://crrev.com/c/1234.\n',
             'INFO: Finished builds:\n',
-            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n',
-            'INFO:   MOCK Try Mac         4000    FAILURE   try   \n',
-            'INFO:   MOCK Try Win         5000    FAILURE   try   \n',
+            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n'
+            '  MOCK Try Mac         4000    FAILURE   try   \n'
+            '  MOCK Try Win         5000    FAILURE   try   \n',
             'INFO: Scheduled or started builds:\n',
-            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n',
-            'INFO:   MOCK Try Linux       --      TRIGGERED try   \n',
+            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n'
+            '  MOCK Try Linux       --      TRIGGERED try   \n',
             'ERROR: Once all pending try jobs have finished, '
             'please re-run the tool to fetch new results.\n',
         ])
@@ -471,12 +471,12 @@ class RebaselineCLTest(BaseTestCase, LoggingTestCase):
         self.assertLog([
             'INFO: Fetching status for 3 builds from https://crrev.com/c/1234.\n',
             'INFO: Finished builds:\n',
-            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n',
-            'INFO:   MOCK Try Win         5000    FAILURE   try   \n',
+            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n'
+            '  MOCK Try Win         5000    FAILURE   try   \n',
             'INFO: Scheduled or started builds:\n',
-            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n',
-            'INFO:   MOCK Try Linux       6000    SCHEDULED try   \n',
-            'INFO:   MOCK Try Mac         4000    STARTED   try   \n',
+            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n'
+            '  MOCK Try Linux       6000    SCHEDULED try   \n'
+            '  MOCK Try Mac         4000    STARTED   try   \n',
             'INFO: Fetching test results for 1 suite.\n',
             'WARNING: Some builders have no results:\n',
             'WARNING:   MOCK Try Linux\n',
@@ -563,9 +563,9 @@ class RebaselineCLTest(BaseTestCase, LoggingTestCase):
         self.assertLog([
             'INFO: Fetching status for 3 builds from https://crrev.com/c/1234.\n',
             'INFO: Finished builds:\n',
-            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n',
-            'INFO:   MOCK Try Mac         4000    FAILURE   try   \n',
-            'INFO:   MOCK Try Win         5000    FAILURE   try   \n',
+            'INFO:   BUILDER              NUMBER  STATUS    BUCKET\n'
+            '  MOCK Try Mac         4000    FAILURE   try   \n'
+            '  MOCK Try Win         5000    FAILURE   try   \n',
             'INFO: Fetching test results for 2 suites.\n',
             'WARNING: Some builders have no results:\n',
             'WARNING:   MOCK Try Linux\n',
@@ -4,11 +4,8 @@
 
 import os
 from core import path_util
-path_util.AddAndroidPylibToPath()
-from telemetry.core import android_platform
 from telemetry.core import util
 from telemetry.page import shared_page_state
-from contrib.vr_benchmarks.desktop_runtimes import openxr_runtimes
 
 class SharedVrPageStateFactory(shared_page_state.SharedPageState):
   """"Factory" for picking the correct SharedVrPageState subclass.
@@ -31,9 +28,13 @@ class SharedVrPageStateFactory(shared_page_state.SharedPageState):
     super(SharedVrPageStateFactory, self).__init__(
         test, finder_options, story_set, possible_browser)
 
-    if isinstance(self.platform, android_platform.AndroidPlatform):
+    # Dispatch on the OS name rather than an isinstance check so that the
+    # Android telemetry modules are only imported on Android, where the
+    # subclass pulls them in.
+    os_name = self.platform.GetOSName().lower()
+    if os_name == 'android':
       self.__class__ = AndroidSharedVrPageState
-    elif self.platform.GetOSName().lower() == 'win':
+    elif os_name == 'win':
       self.__class__ = WindowsSharedVrPageState
     else:
       raise NotImplementedError(
@@ -76,7 +77,17 @@ class AndroidSharedVrPageState(_SharedVrPageState):
      AndroidScreenRestorationSharedState ensures that the screen is on. See
      _CycleScreen() for an explanation on the reasoning behind this.
   """
+  # Cache of the newest VrNfcSimulator.apk per checkout, mapping
+  # chromium_root to an (mtime, path) tuple. The shared page state is
+  # constructed once per benchmark run, and the APK only changes when the
+  # build output does, so the full build directory walk can be skipped as
+  # long as the cached APK's mtime is unchanged.
+  _cached_apk_path = {}
+
   def __init__(self, test, finder_options, story_set, possible_browser=None):
+    # Deferred to state construction so non-Android runs never pay for the
+    # Android pylib path setup.
+    path_util.AddAndroidPylibToPath()
     super(AndroidSharedVrPageState, self).__init__(
         test, finder_options, story_set, possible_browser)
     self._InstallNfcApk()
@@ -84,20 +95,35 @@ class AndroidSharedVrPageState(_SharedVrPageState):
   def _InstallNfcApk(self):
     """Installs the APK that allows VR tests to simulate a headset NFC scan."""
     chromium_root = path_util.GetChromiumSrcDir()
-    # Find the most recently build APK
-    candidate_apks = []
+    newest_apk_path = self._FindNfcApk(chromium_root)
+    self.platform.InstallApplication(
+        os.path.join(chromium_root, newest_apk_path))
+
+  @classmethod
+  def _FindNfcApk(cls, chromium_root):
+    """Finds the most recently built VrNfcSimulator.apk in the checkout."""
+    cached = cls._cached_apk_path.get(chromium_root)
+    if cached:
+      last_changed, apk_path = cached
+      try:
+        if os.path.getmtime(apk_path) == last_changed:
+          return apk_path
+      except OSError:
+        # The cached APK is gone; fall through to a full search.
+        pass
+    newest_apk = None
     for build_path in util.GetBuildDirectories(chromium_root):
       apk_path = os.path.join(build_path, 'apks', 'VrNfcSimulator.apk')
       if os.path.exists(apk_path):
         last_changed = os.path.getmtime(apk_path)
-        candidate_apks.append((last_changed, apk_path))
+        if newest_apk is None or (last_changed, apk_path) > newest_apk:
+          newest_apk = (last_changed, apk_path)
 
-    if not candidate_apks:
+    if newest_apk is None:
       raise RuntimeError(
           'Could not find VrNfcSimulator.apk in a build output directory')
-    newest_apk_path = sorted(candidate_apks)[-1][1]
-    self.platform.InstallApplication(
-        os.path.join(chromium_root, newest_apk_path))
+    cls._cached_apk_path[chromium_root] = newest_apk
+    return newest_apk[1]
 
   def WillRunStory(self, story):
     super(AndroidSharedVrPageState, self).WillRunStory(story)
@@ -133,19 +159,9 @@ class WindowsSharedVrPageState(_SharedVrPageState):
   VR runtimes before and after all stories are run.
   """
 
-  # Constants to make the below map more readable
-  MOCK_RUNTIME = False
-  REAL_RUNTIME = True
-  # Map of runtime names to runtime classes for both real and mock
-  # implementations. Real runtimes require specialized hardware and software
-  # to be installed, i.e. exactly how a real user would use VR. Mock runtimes
-  # avoid this, but can't necessarily be implemented.
-  DESKTOP_RUNTIMES = {
-      'openxr': {
-          MOCK_RUNTIME: openxr_runtimes.OpenXRRuntimeMock,
-          REAL_RUNTIME: openxr_runtimes.OpenXRRuntimeReal,
-      },
-  }
+  # Names of the supported runtimes; the classes themselves are resolved
+  # lazily by _ResolveRuntimeClass.
+  DESKTOP_RUNTIME_NAMES = ('openxr',)
 
   def __init__(self, test, finder_options, story_set, possible_browser):
     super(WindowsSharedVrPageState, self).__init__(
@@ -153,12 +169,29 @@ class WindowsSharedVrPageState(_SharedVrPageState):
 
     # Get the specific runtime implementation depending on runtime choice and
     # whether we're using the real or mock one.
-    self._desktop_runtime = self.DESKTOP_RUNTIMES[
-        self._finder_options.desktop_runtime][
-            self._finder_options.use_real_runtime](
-                self._finder_options, self._possible_browser)
+    runtime_class = self._ResolveRuntimeClass(
+        self._finder_options.desktop_runtime,
+        self._finder_options.use_real_runtime)
+    self._desktop_runtime = runtime_class(self._finder_options,
+                                          self._possible_browser)
     self._desktop_runtime.Setup()
 
+  @staticmethod
+  def _ResolveRuntimeClass(runtime_name, use_real_runtime):
+    """Resolves a runtime name to a runtime class.
+
+    Real runtimes require specialized hardware and software to be installed,
+    i.e. exactly how a real user would use VR. Mock runtimes avoid this, but
+    can't necessarily be implemented. The runtime module is only imported
+    here, once a runtime is actually chosen.
+    """
+    if runtime_name == 'openxr':
+      from contrib.vr_benchmarks.desktop_runtimes import openxr_runtimes
+      if use_real_runtime:
+        return openxr_runtimes.OpenXRRuntimeReal
+      return openxr_runtimes.OpenXRRuntimeMock
+    raise KeyError(runtime_name)
+
   def WillRunStory(self, story):
     super(WindowsSharedVrPageState, self).WillRunStory(story)
     self._desktop_runtime.WillRunStory()
@@ -48,7 +48,7 @@ class _BaseVRBenchmark(perf_benchmark.PerfBenchmark):
     parser.add_argument(
         '--desktop-runtime',
         default='openxr',
-        choices=list(vr_state.WindowsSharedVrPageState.DESKTOP_RUNTIMES.keys()),
+        choices=list(vr_state.WindowsSharedVrPageState.DESKTOP_RUNTIME_NAMES),
         help='Which VR runtime to use on Windows. Defaults to %(default)s')
     parser.add_argument(
         '--use-real-runtime',
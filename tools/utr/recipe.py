@@ -3,7 +3,7 @@
 # found in the LICENSE file.
 """Utilities for invoking recipes"""
 
-import asyncio
+import functools
 import json
 import logging
 import os
@@ -12,6 +12,7 @@ import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 
 from collections import namedtuple
 from rich import markdown
@@ -20,36 +21,69 @@ from rich import console
 import output_adapter
 
 # Disable some noisy logs.
-logging.getLogger('asyncio').setLevel(logging.WARNING)
 logging.getLogger('markdown_it').setLevel(logging.WARNING)
 
+# Builder props can be sizable, and they're re-serialized on every recipe
+# (re-)invocation. Prefer orjson for the encode/decode hot spots when it's
+# available; its JSONDecodeError subclasses the stdlib's, so error handling
+# is unchanged.
+try:
+  import orjson
+
+  def _json_dumps(obj):
+    return orjson.dumps(obj).decode('utf-8')
+
+  _json_loads = orjson.loads
+except ImportError:
+  _json_dumps = json.dumps
+  _json_loads = json.loads
+
 _THIS_DIR = pathlib.Path(__file__).resolve().parent
 _SRC_DIR = _THIS_DIR.parents[1]
 
 RerunOption = namedtuple('RerunOption', ['prompt', 'properties'])
 
+# Memoized result of looking up the `rdb` binary on PATH.
+_RDB_PATH = None
+
+
+def _get_rdb_path():
+  """Returns the absolute path to the `rdb` binary, caching the PATH scan."""
+  global _RDB_PATH
+  if _RDB_PATH is None:
+    _RDB_PATH = shutil.which('rdb')
+  return _RDB_PATH
+
 
 def check_rdb_auth():
   """Checks that the user is logged in with resultdb."""
-  rdb_path = shutil.which('rdb')
+  rdb_path = _get_rdb_path()
   if not rdb_path:
     logging.error("'rdb' binary not found. Is depot_tools not on PATH?")
     return False
   cmd = [rdb_path, 'auth-info']
   try:
-    p = subprocess.run(cmd,
-                       stdout=subprocess.PIPE,
-                       stderr=subprocess.STDOUT,
-                       text=True,
-                       check=True)
-  except subprocess.CalledProcessError:
+    subprocess.run(cmd, capture_output=True, text=True, check=True)
+  except subprocess.CalledProcessError as e:
     logging.error('No rdb auth available:')
-    logging.error(p.stdout.strip())
+    logging.error(e.stdout.strip() if e.stdout else '')
     logging.error("Please run 'rdb auth-login' to authenticate")
     return False
   return True
 
 
+@functools.lru_cache(maxsize=8)
+def _prompt_options(prompts):
+  """Precomputes the prompt string and lowercased options for the prompts.
+
+  The same warning prompts tend to recur across the recipe re-run loop, so
+  cache the formatted prompt and the lowercased forms used for matching.
+  """
+  options = '/'.join(f'({prompt[0]}){prompt[1:]}' for prompt in prompts)
+  return (f'How do you wish to proceed? Please enter {options} to confirm: ',
+          tuple(prompt.lower() for prompt in prompts))
+
+
 def get_prompt_resp(rerun_props):
   """Prompts the user for how to continue based on recipe output
 
@@ -60,14 +94,13 @@ def get_prompt_resp(rerun_props):
     Dict of properties to use for the next recipe invocation. None or an empty
         dict of properties indicate the recipe should not be reinvoked.
   """
-  options = '/'.join(f'({option.prompt[0]}){option.prompt[1:]}'
-                     for option in rerun_props)
-  prompt = (f'How do you wish to proceed? Please enter {options} to confirm: ')
+  prompt, lowered_prompts = _prompt_options(
+      tuple(option.prompt for option in rerun_props))
   resp = input(prompt).strip().lower()
 
-  for option in rerun_props:
+  for lowered_prompt, option in zip(lowered_prompts, rerun_props):
     # An empty resp will default to the first option like a --force run
-    if option.prompt.lower().startswith(resp):
+    if lowered_prompt.startswith(resp):
       return option.properties
   return None
 
@@ -109,11 +142,20 @@ class LegacyRunner:
           default otherwise if needed.
     """
     self._recipes_py = recipes_py
-    self._swarming_server = swarming_server
     self._skip_prompts = skip_prompts
-    self._console_printer = console.Console()
+    # Auto-highlighting walks every printed string looking for things like
+    # numbers and URLs to colorize; not worth it for our output.
+    self._console_printer = console.Console(highlight=False)
     assert self._recipes_py.exists()
 
+    # The process env and swarming server don't change between re-runs, so
+    # build the recipe env once. SWARMING_SERVER is read by both the cas and
+    # swarming recipe modules to determine where to upload/run things.
+    self._env = {
+        **os.environ,
+        'SWARMING_SERVER': f'https://{swarming_server}.appspot.com',
+    }
+
     # Add UTR recipe props. Its schema is located at:
     # https://chromium.googlesource.com/chromium/tools/build/+/HEAD/recipes/recipes/chromium/universal_test_runner.proto
     input_props = builder_props.copy()
@@ -150,11 +192,12 @@ class LegacyRunner:
     }
     self._input_props = input_props
 
-  def _run(self, adapter, additional_props=None):
+  def _run(self, adapter, tmp_dir, additional_props=None):
     """Internal implementation of invoking `recipes.py run`.
 
     Args:
       adapter: A output_adapter.Adapter for parsing recipe output.
+      tmp_dir: Path to a temp dir the recipe's output files are written to.
       additional_props: Dict containing additional props to pass to the recipe.
     Returns:
       Tuple of
@@ -162,90 +205,107 @@ class LegacyRunner:
         summary markdown of the `recipes.py` invocation,
         a dict of additional_props the recipe should be re-invoked with
     """
-    input_props = self._input_props.copy()
-    input_props.update(additional_props or {})
-    with tempfile.TemporaryDirectory() as tmp_dir:
-
-      # TODO(crbug.com/41492688): Support both chrome and chromium realms. Just
-      # hard-code 'chromium' for now.
-      # Put all results in "try" realms. "try" should be writable for most devs,
-      # while other realms like "ci" likely aren't. "try" is generally where we
-      # confine untested code, so it's the best fit for our results here.
-      rdb_realm = 'chromium:try'
-
-      output_path = pathlib.Path(tmp_dir).joinpath('out.json')
-      rerun_props_path = pathlib.Path(tmp_dir).joinpath('rerun_props.json')
-      input_props['output_properties_file'] = str(rerun_props_path)
-      cmd = [
-          'rdb',
-          'stream',
-          '-new',
-          '-realm',
-          rdb_realm,
-          '--',
-          self._recipes_py,
-          'run',
-          '--output-result-json',
-          output_path,
-          '--properties-file',
-          '-',  # '-' means read from stdin
-          self.UTR_RECIPE_NAME,
+    input_props = {**self._input_props, **(additional_props or {})}
+
+    # TODO(crbug.com/41492688): Support both chrome and chromium realms. Just
+    # hard-code 'chromium' for now.
+    # Put all results in "try" realms. "try" should be writable for most devs,
+    # while other realms like "ci" likely aren't. "try" is generally where we
+    # confine untested code, so it's the best fit for our results here.
+    rdb_realm = 'chromium:try'
+
+    output_path = os.path.join(tmp_dir, 'out.json')
+    rerun_props_path = os.path.join(tmp_dir, 'rerun_props.json')
+    # The temp dir is reused across re-runs; clear out any output files
+    # left over from the previous invocation.
+    for stale_path in (output_path, rerun_props_path):
+      try:
+        os.remove(stale_path)
+      except FileNotFoundError:
+        pass
+    input_props['output_properties_file'] = rerun_props_path
+    cmd = [
+        _get_rdb_path(),
+        'stream',
+        '-new',
+        '-realm',
+        rdb_realm,
+        '--',
+        self._recipes_py,
+        'run',
+        '--output-result-json',
+        output_path,
+        '--properties-file',
+        '-',  # '-' means read from stdin
+        self.UTR_RECIPE_NAME,
+    ]
+    # The recipe is a single producer and we're a single consumer, so
+    # there's nothing for an event loop to overlap: just write the props
+    # to stdin and iterate stdout's lines as they come.
+    payload = _json_dumps(input_props)
+    proc = subprocess.Popen(cmd,
+                            stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT,
+                            env=self._env,
+                            bufsize=1,
+                            text=True,
+                            encoding='utf-8',
+                            errors='replace')
+
+    def write_stdin():
+      try:
+        with proc.stdin:
+          proc.stdin.write(payload)
+      except BrokenPipeError:
+        # The recipe exited without reading its input; its exit code tells
+        # the rest of the story.
+        pass
+
+    # Feed stdin from a helper thread so a recipe that prints heavily before
+    # draining its input can't deadlock against our blocking write, while
+    # lines are still processed incrementally on this thread.
+    stdin_thread = threading.Thread(target=write_stdin, daemon=True)
+    stdin_thread.start()
+    for line in proc.stdout:
+      try:
+        adapter.ProcessLine(line.rstrip(os.linesep))
+      except ValueError:
+        logging.exception('Failed to parse line from the recipe')
+    returncode = proc.wait()
+    stdin_thread.join()
+
+    # Try to pull out the summary markdown from the recipe run. Open the
+    # file directly rather than checking for existence first; the recipe not
+    # writing it is an expected outcome.
+    failure_md = ''
+    try:
+      with open(output_path) as f:
+        output = _json_loads(f.read())
+      failure_md = output.get('failure', {}).get('humanReason', '')
+      # TODO(crbug.com/41492688): Also pull out info about gclient/GN arg
+      # mismatches, surface those as a Y/N prompt to the user, and re-run
+      # if Y.
+    except FileNotFoundError:
+      logging.error('Recipe output json not found')
+    except json.decoder.JSONDecodeError:
+      logging.exception('Recipe output is invalid json')
+
+    # If this file exists, the recipe is signalling to us that there's an
+    # issue, and that we need to re-run if we're sure we want to proceed.
+    # The contents of the file are the properties we should re-run it with.
+    try:
+      with open(rerun_props_path) as f:
+        raw_json = _json_loads(f.read())
+      rerun_props = [
+          RerunOption(prompt=prompt[0], properties=prompt[1])
+          for prompt in raw_json
       ]
-      env = os.environ.copy()
-      # This env var is read by both the cas and swarming recipe modules to
-      # determine where to upload/run things.
-      env['SWARMING_SERVER'] = f'https://{self._swarming_server}.appspot.com'
-
-      async def exec_recipe():
-        proc = await asyncio.create_subprocess_exec(
-            cmd[0],
-            *cmd[1:],
-            limit=1024 * 1024 * 128,  # 128 MiB: there can be massive lines
-            env=env,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT)
-
-        proc.stdin.write(json.dumps(input_props).encode('ascii'))
-        proc.stdin.write_eof()
-        while not proc.stdout.at_eof():
-          try:
-            line = await proc.stdout.readline()
-            adapter.ProcessLine(line.decode('utf-8').strip(os.linesep))
-          except ValueError:
-            logging.exception('Failed to parse line from the recipe')
-        await proc.wait()
-        return proc.returncode
-
-      returncode = asyncio.run(exec_recipe())
-
-      # Try to pull out the summary markdown from the recipe run.
-      failure_md = ''
-      if not output_path.exists():
-        logging.error('Recipe output json not found')
-      else:
-        try:
-          with open(output_path) as f:
-            output = json.load(f)
-          failure_md = output.get('failure', {}).get('humanReason', '')
-          # TODO(crbug.com/41492688): Also pull out info about gclient/GN arg
-          # mismatches, surface those as a Y/N prompt to the user, and re-run
-          # if Y.
-        except json.decoder.JSONDecodeError:
-          logging.exception('Recipe output is invalid json')
-
-      # If this file exists, the recipe is signalling to us that there's an
-      # issue, and that we need to re-run if we're sure we want to proceed.
-      # The contents of the file are the properties we should re-run it with.
+    except FileNotFoundError:
+      # No file means the recipe isn't asking for a re-run.
       rerun_props = []
-      if rerun_props_path.exists():
-        with open(rerun_props_path) as f:
-          raw_json = json.load(f)
-          for prompt in raw_json:
-            rerun_props.append(
-                RerunOption(prompt=prompt[0], properties=prompt[1]))
 
-      return returncode, failure_md, rerun_props
+    return returncode, failure_md, rerun_props
 
   def run_recipe(self, filter_stdout=True):
     """Runs the UTR recipe with the settings defined on the CLI.
@@ -255,19 +315,30 @@ class LegacyRunner:
     Returns:
       Tuple of (exit code, error message) of the `recipes.py` invocation.
     """
-    props_to_use = None
     if filter_stdout:
       adapter = output_adapter.LegacyOutputAdapter()
     else:
       adapter = output_adapter.PassthroughAdapter()
     # We might need to run the recipe a handful of times before we receive a
     # final result. Put a cap on the amount of re-runs though, just in case.
+    # The temp dir for the recipe's output files is shared across the re-runs;
+    # _run clears its files between invocations.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+      return self._run_with_retries(adapter, tmp_dir)
+
+  def _run_with_retries(self, adapter, tmp_dir):
+    """Invokes the recipe until a final result, prompting on warnings."""
+    props_to_use = None
+    prev_props_to_use = None
+    prev_rerun_prop_options = None
     for _ in range(10):
       exit_code, failure_md, rerun_prop_options = self._run(
-          adapter, props_to_use)
+          adapter, tmp_dir, props_to_use)
       # For in-line code snippets in markdown, style them as python. This
-      # seems the least weird-looking.
-      pretty_md = markdown.Markdown(failure_md, inline_code_lexer='python')
+      # seems the least weird-looking. Skip the parse entirely when there's
+      # no markdown to render, i.e. the happy path.
+      pretty_md = markdown.Markdown(
+          failure_md, inline_code_lexer='python') if failure_md else None
       if not rerun_prop_options:
         if exit_code:
           # Use the markdown printer from "rich" to better format the text in
@@ -283,9 +354,12 @@ class LegacyRunner:
           logging.info('For futher information, see the full test results at:')
           logging.info(results_link)
         return exit_code, 'Build/test failure' if exit_code else None
-      logging.warning('')
-      self._console_printer.print(pretty_md)
-      logging.warning('')
+      if pretty_md:
+        # One console write for the blank separator lines and the rendered
+        # markdown, rather than three interleaved logging/console calls.
+        self._console_printer.print('\n', pretty_md, '\n')
+      else:
+        logging.warning('')
       if not self._skip_prompts:
         props_to_use = get_prompt_resp(rerun_prop_options)
       else:
@@ -298,4 +372,11 @@ class LegacyRunner:
         props_to_use = rerun_prop_options[0].properties
       if not props_to_use:
         return exit_code, 'User-aborted due to warning'
+      # Re-running with the same props in response to the same warning will
+      # just loop until the cap; each run costs minutes, so bail out now.
+      if (props_to_use == prev_props_to_use
+          and rerun_prop_options == prev_rerun_prop_options):
+        return 1, 'Recipe looping on same warning'
+      prev_props_to_use = props_to_use
+      prev_rerun_prop_options = rerun_prop_options
     return 1, 'Exceeded too many recipe re-runs'
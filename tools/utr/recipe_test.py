@@ -17,21 +17,16 @@ import recipe
 
 class LegacyRunnerTests(unittest.TestCase):
 
-  class AsyncMock(mock.MagicMock):
-
-    def __init__(self, *args, **kwargs):
-      super().__init__(*args, **kwargs)
-      self.returncode = 0
-
-    async def wait(self):
-      pass
-
   def setUp(self):
     self.tmp_dir = pathlib.Path(tempfile.mkdtemp())
     self.tmp_dir.joinpath('recipes').touch()
     self.addCleanup(shutil.rmtree, self.tmp_dir)
 
-    self.subp_mock = self.AsyncMock()
+    # Iterating the mock's stdout yields no lines, and wait() returns the
+    # mock's returncode.
+    self.subp_mock = mock.MagicMock()
+    self.subp_mock.returncode = 0
+    self.subp_mock.wait.side_effect = lambda: self.subp_mock.returncode
 
     patch_tempdir = mock.patch('tempfile.TemporaryDirectory')
     self.mock_tempdir = patch_tempdir.start()
@@ -42,6 +37,31 @@ class LegacyRunnerTests(unittest.TestCase):
     self.mock_input = patch_input.start()
     self.addCleanup(patch_input.stop)
 
+  def _popen_mock(self, files_per_run):
+    """Returns a subprocess.Popen side effect that writes recipe outputs.
+
+    _run clears the recipe's output files from the shared temp dir before
+    each invocation, so the mock re-creates them the way the real recipe
+    would.
+
+    Args:
+      files_per_run: List of dicts mapping file name to contents, one dict
+          per expected recipe invocation. String contents are written
+          verbatim, anything else is json-dumped.
+    """
+    runs = iter(files_per_run)
+
+    def popen(*args, **kwargs):
+      for name, contents in next(runs, {}).items():
+        with open(self.tmp_dir.joinpath(name), 'w') as f:
+          if isinstance(contents, str):
+            f.write(contents)
+          else:
+            json.dump(contents, f)
+      return self.subp_mock
+
+    return popen
+
   def testProps(self):
     runner = recipe.LegacyRunner(self.tmp_dir, {}, 'some-bucket',
                                  'some-builder', 'swarming-server', [], False,
@@ -55,7 +75,7 @@ class LegacyRunnerTests(unittest.TestCase):
                                  'some-builder', 'swarming-server', [], False,
                                  False, False)
     self.subp_mock.returncode = 123
-    with mock.patch('asyncio.create_subprocess_exec',
+    with mock.patch('subprocess.Popen',
                     return_value=self.subp_mock):
       exit_code, _ = runner.run_recipe()
       self.assertEqual(exit_code, 123)
@@ -64,30 +84,36 @@ class LegacyRunnerTests(unittest.TestCase):
     runner = recipe.LegacyRunner(self.tmp_dir, {}, 'some-bucket',
                                  'some-builder', 'swarming-server', [], False,
                                  False, False)
-    with mock.patch('asyncio.create_subprocess_exec',
-                    return_value=self.subp_mock):
-      # Passing run.
-      self.subp_mock.returncode = 0
-      with open(self.tmp_dir.joinpath('out.json'), 'w') as f:
-        json.dump({}, f)
+    # Passing run.
+    self.subp_mock.returncode = 0
+    with mock.patch('subprocess.Popen',
+                    side_effect=self._popen_mock([{'out.json': {}}])):
       _, error_msg = runner.run_recipe()
       self.assertIsNone(error_msg)
 
-      # Missing json file
-      self.subp_mock.returncode = 1
+    # Missing json file
+    self.subp_mock.returncode = 1
+    with mock.patch('subprocess.Popen',
+                    side_effect=self._popen_mock([{}])):
       _, error_msg = runner.run_recipe()
       self.assertEqual(error_msg, 'Build/test failure')
 
-      # Broken json
-      with open(self.tmp_dir.joinpath('out.json'), 'w') as f:
-        f.write('this-is-not-json')
+    # Broken json
+    with mock.patch('subprocess.Popen',
+                    side_effect=self._popen_mock(
+                        [{'out.json': 'this-is-not-json'}])):
       _, error_msg = runner.run_recipe()
       self.assertEqual(error_msg, 'Build/test failure')
 
-      # Actual json. It'll get printed to the terminal, so all that run_recipe()
-      # returns is a generic failure message.
-      with open(self.tmp_dir.joinpath('out.json'), 'w') as f:
-        json.dump({'failure': {'humanReason': 'it exploded'}}, f)
+    # Actual json. It'll get printed to the terminal, so all that run_recipe()
+    # returns is a generic failure message.
+    with mock.patch('subprocess.Popen',
+                    side_effect=self._popen_mock(
+                        [{'out.json': {
+                            'failure': {
+                                'humanReason': 'it exploded'
+                            }
+                        }}])):
       _, error_msg = runner.run_recipe()
       self.assertEqual(error_msg, 'Build/test failure')
 
@@ -95,50 +121,52 @@ class LegacyRunnerTests(unittest.TestCase):
     runner = recipe.LegacyRunner(self.tmp_dir, {}, 'some-bucket',
                                  'some-builder', 'swarming-server', [], False,
                                  False, False)
-    with mock.patch('asyncio.create_subprocess_exec',
-                    return_value=self.subp_mock):
-      # Input "n" to the first re-run prompt.
-      self.mock_input.return_value = 'n'
-      with open(self.tmp_dir.joinpath('rerun_props.json'), 'w') as f:
-        json.dump([['y', {'some-new-prop': 'some-val'}], ['n', {}]], f)
+    rerun_props = [['y', {'some-new-prop': 'some-val'}], ['n', {}]]
+
+    # Input "n" to the first re-run prompt.
+    self.mock_input.return_value = 'n'
+    with mock.patch('subprocess.Popen',
+                    side_effect=self._popen_mock(
+                        [{'rerun_props.json': rerun_props}])):
       _, error_msg = runner.run_recipe()
       self.assertEqual(error_msg, 'User-aborted due to warning')
 
-      # Input "y" to too many re-runs.
-      self.mock_input.return_value = 'y'
-      with open(self.tmp_dir.joinpath('rerun_props.json'), 'w') as f:
-        json.dump([['y', {'some-new-prop': 'some-val'}], ['n', {}]], f)
+    # Input "y" to the same warning twice in a row.
+    self.mock_input.return_value = 'y'
+    with mock.patch('subprocess.Popen',
+                    side_effect=self._popen_mock(
+                        [{'rerun_props.json': rerun_props}] * 10)):
+      _, error_msg = runner.run_recipe()
+      self.assertEqual(error_msg, 'Recipe looping on same warning')
+
+    # Input "y" to too many distinct re-run warnings.
+    self.mock_input.return_value = 'y'
+    distinct_props = [{
+        'rerun_props.json': [['y', {'some-new-prop': i}], ['n', {}]]
+    } for i in range(10)]
+    with mock.patch('subprocess.Popen',
+                    side_effect=self._popen_mock(distinct_props)):
       _, error_msg = runner.run_recipe()
       self.assertEqual(error_msg, 'Exceeded too many recipe re-runs')
 
-      # Re-running once and succeeding. Need to manage two different tmp dirs,
-      # one for each recipe invocations.
-      first_tmp_dir = self.tmp_dir
-      second_tmp_dir = pathlib.Path(tempfile.mkdtemp())
-      self.addCleanup(shutil.rmtree, second_tmp_dir)
-      self.mock_input.return_value = 'y'
-      with open(first_tmp_dir.joinpath('rerun_props.json'), 'w') as f:
-        json.dump([['y', {'some-new-prop': 'some-val'}], ['n', {}]], f)
-      self.mock_tempdir.side_effect = [first_tmp_dir, second_tmp_dir]
+    # Re-running once and succeeding.
+    self.mock_input.return_value = 'y'
+    with mock.patch('subprocess.Popen',
+                    side_effect=self._popen_mock(
+                        [{'rerun_props.json': rerun_props}, {}])):
       _, error_msg = runner.run_recipe()
       self.assertIsNone(error_msg)
 
-
   def testRerunsWithForce(self):
     runner = recipe.LegacyRunner(self.tmp_dir, {}, 'some-bucket',
                                  'some-builder', 'swarming-server', [], False,
                                  False, True)
-    with mock.patch('asyncio.create_subprocess_exec',
-                    return_value=self.subp_mock):
-      # Re-running once and succeeding. Need to manage two different tmp dirs,
-      # one for each recipe invocations. input() shouldn't be called since we
-      # pass --force.
-      first_tmp_dir = self.tmp_dir
-      second_tmp_dir = pathlib.Path(tempfile.mkdtemp())
-      self.addCleanup(shutil.rmtree, second_tmp_dir)
-      with open(first_tmp_dir.joinpath('rerun_props.json'), 'w') as f:
-        json.dump([['y', {'some-new-prop': 'some-val'}], ['n', {}]], f)
-      self.mock_tempdir.side_effect = [first_tmp_dir, second_tmp_dir]
+    # Re-running once and succeeding. input() shouldn't be called since we
+    # pass --force.
+    rerun_props = [['y', {'some-new-prop': 'some-val'}], ['n', {}]]
+    with mock.patch('subprocess.Popen',
+                    side_effect=self._popen_mock(
+                        [{'rerun_props.json': rerun_props}, {}])):
       _, error_msg = runner.run_recipe()
       self.assertIsNone(error_msg)
       self.mock_input.assert_not_called()